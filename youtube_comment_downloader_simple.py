@@ -22,15 +22,21 @@ python youtube_comment_downloader_simple.py --url "https://www.youtube.com/watch
 from __future__ import print_function
 
 import argparse
-import io
+import functools
 import json
 import os
 import re
 import sys
+import threading
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 
 import dateparser
+import orjson
 import requests
+import requests.adapters
 
 # 常量定义
 YOUTUBE_VIDEO_URL = 'https://www.youtube.com/watch?v={youtube_id}'
@@ -41,12 +47,38 @@ USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTM
 SORT_BY_POPULAR = 0
 SORT_BY_RECENT = 1
 
-YT_CFG_RE = r'ytcfg\.set\s*\(\s*({.+?})\s*\)\s*;'
-YT_INITIAL_DATA_RE = r'(?:window\s*\[\s*["\']ytInitialData["\']\s*\]|ytInitialData)\s*=\s*({.+?})\s*;\s*(?:var\s+meta|</script|\n)'
-YT_HIDDEN_INPUT_RE = r'<input\s+type="hidden"\s+name="([A-Za-z0-9_]+)"\s+value="([A-Za-z0-9_\-\.]*)"\s*(?:required|)\s*>'
+# 只匹配到JSON对象起始的"{"为止，对象本身交给JSON解码器解析
+YT_CFG_RE = re.compile(r'ytcfg\.set\s*\(\s*(?={)')
+YT_INITIAL_DATA_RE = re.compile(r'(?:window\s*\[\s*["\']ytInitialData["\']\s*\]|ytInitialData)\s*=\s*(?={)')
+# 常见的英文相对时间格式，例如"3 hours ago"，无需经过dateparser
+RELATIVE_TIME_RE = re.compile(r'(\d+)\s+(second|minute|hour|day|week)s?\s+ago')
+YT_HIDDEN_INPUT_RE = re.compile(r'<input\s+type="hidden"\s+name="([A-Za-z0-9_]+)"\s+value="([A-Za-z0-9_\-\.]*)"\s*(?:required|)\s*>')
+
+TIME_UNIT_SECONDS = {'second': 1, 'minute': 60, 'hour': 60 * 60, 'day': 24 * 60 * 60, 'week': 7 * 24 * 60 * 60}
 
 INDENT = 4
 
+# 同时预取的续接请求数量
+PREFETCH = 4
+
+# 每下载多少条评论刷新一次进度
+PROGRESS_INTERVAL = 64
+
+# 输出文件的写缓冲区大小（1 MiB）
+OUTPUT_BUFFER_SIZE = 1 << 20
+
+JSON_DECODER = json.JSONDecoder()
+
+# 评论区续接操作的targetId
+COMMENT_SECTION_TARGET_IDS = frozenset(['comments-section',
+                                        'engagement-panel-comments-section',
+                                        'shorts-engagement-panel-comments-section'])
+
+# 每个AJAX响应中需要查找的键，通过一次遍历全部收集
+RESPONSE_KEYS = ('externalErrorMessage', 'reloadContinuationItemsCommand', 'appendContinuationItemsAction',
+                 'commentSurfaceEntityPayload', 'commentViewModel', 'engagementToolbarStateEntityPayload',
+                 'commentEntityPayload')
+
 
 class YoutubeCommentDownloader:
     """YouTube评论下载器类"""
@@ -55,24 +87,49 @@ class YoutubeCommentDownloader:
         self.session = requests.Session()
         self.session.headers['User-Agent'] = USER_AGENT
         self.session.cookies.set('CONSENT', 'YES+cb', domain='.youtube.com')
+        # 连接池大小与预取线程数一致，保证并发请求都能复用连接
+        self.session.mount('https://', requests.adapters.HTTPAdapter(pool_maxsize=PREFETCH))
+        self.executor = ThreadPoolExecutor(max_workers=PREFETCH)
 
-    def ajax_request(self, endpoint, ytcfg, retries=5, sleep=20, timeout=60):
-        """执行YouTube AJAX请求"""
+    def ajax_request(self, endpoint, ytcfg, retries=5, sleep=20, timeout=60, stop=None):
+        """执行YouTube AJAX请求；stop事件被设置后不再重试，直接返回None"""
         url = 'https://www.youtube.com' + endpoint['commandMetadata']['webCommandMetadata']['apiUrl']
 
         data = {'context': ytcfg['INNERTUBE_CONTEXT'],
                 'continuation': endpoint['continuationCommand']['token']}
+        # 请求体只编码一次，重试时复用
+        body = orjson.dumps(data)
 
         for _ in range(retries):
+            if stop is not None and stop.is_set():
+                return None
             try:
-                response = self.session.post(url, params={'key': ytcfg['INNERTUBE_API_KEY']}, json=data, timeout=timeout)
+                response = self.session.post(url, params={'key': ytcfg['INNERTUBE_API_KEY']}, data=body,
+                                             headers={'Content-Type': 'application/json'}, timeout=timeout)
                 if response.status_code == 200:
-                    return response.json()
+                    return orjson.loads(response.content)
                 if response.status_code in [403, 413]:
                     return {}
             except requests.exceptions.Timeout:
                 pass
-            time.sleep(sleep)
+            if stop is None:
+                time.sleep(sleep)
+            elif stop.wait(sleep):
+                return None
+
+    def fetch_page(self, endpoint, ytcfg, stop=None):
+        """在预取线程中请求续接页，并提前完成响应遍历和发布时间解析
+
+        这些工作在主线程等待网络或休眠时进行，返回(response, found, times)，
+        其中times把每个发布时间文本映射到parse_time的结果。
+        """
+        response = self.ajax_request(endpoint, ytcfg, stop=stop)
+        if not response:
+            return response, None, None
+        found = self.search_keys(response, RESPONSE_KEYS)
+        published = {comment['properties']['publishedTime'] for comment in found['commentEntityPayload']}
+        times = {text: parse_time(text) for text in published}
+        return response, found, times
 
     def get_comments(self, youtube_id, *args, **kwargs):
         """通过YouTube视频ID获取评论"""
@@ -84,18 +141,18 @@ class YoutubeCommentDownloader:
 
         if 'consent' in str(response.url):
             # 自动同意cookie政策
-            params = dict(re.findall(YT_HIDDEN_INPUT_RE, response.text))
+            params = dict(YT_HIDDEN_INPUT_RE.findall(response.text))
             params.update({'continue': youtube_url, 'set_eom': False, 'set_ytc': True, 'set_apyt': True})
             response = self.session.post(YOUTUBE_CONSENT_URL, params=params)
 
         html = response.text
-        ytcfg = json.loads(self.regex_search(html, YT_CFG_RE, default='{}'))
+        ytcfg = self.json_search(html, YT_CFG_RE, default={})
         if not ytcfg:
             return  # 无法提取配置
         if language:
             ytcfg['INNERTUBE_CONTEXT']['client']['hl'] = language
 
-        data = json.loads(self.regex_search(html, YT_INITIAL_DATA_RE, default='{}'))
+        data = self.json_search(html, YT_INITIAL_DATA_RE, default={})
 
         item_section = next(self.search_dict(data, 'itemSectionRenderer'), None)
         renderer = next(self.search_dict(item_section, 'continuationItemRenderer'), None) if item_section else None
@@ -113,101 +170,157 @@ class YoutubeCommentDownloader:
             sort_menu = next(self.search_dict(data, 'sortFilterSubMenuRenderer'), {}).get('subMenuItems', [])
         if not sort_menu or sort_by >= len(sort_menu):
             raise RuntimeError('无法设置排序')
-        continuations = [sort_menu[sort_by]['serviceEndpoint']]
-
-        while continuations:
-            continuation = continuations.pop()
-            response = self.ajax_request(continuation, ytcfg)
-
-            if not response:
-                break
-
-            error = next(self.search_dict(response, 'externalErrorMessage'), None)
-            if error:
-                raise RuntimeError('服务器返回错误: ' + error)
-
-            actions = list(self.search_dict(response, 'reloadContinuationItemsCommand')) + \
-                      list(self.search_dict(response, 'appendContinuationItemsAction'))
-            for action in actions:
-                for item in action.get('continuationItems', []):
-                    if action['targetId'] in ['comments-section',
-                                              'engagement-panel-comments-section',
-                                              'shorts-engagement-panel-comments-section']:
-                        # 处理评论和回复的续接
-                        continuations[:0] = [ep for ep in self.search_dict(item, 'continuationEndpoint')]
-                    if action['targetId'].startswith('comment-replies-item') and 'continuationItemRenderer' in item:
-                        # 处理"显示更多回复"按钮
-                        continuations.append(next(self.search_dict(item, 'buttonRenderer'))['command'])
-
-            surface_payloads = self.search_dict(response, 'commentSurfaceEntityPayload')
-            payments = {payload['key']: next(self.search_dict(payload, 'simpleText'), '')
-                        for payload in surface_payloads if 'pdgCommentChip' in payload}
-            if payments:
-                # 我们需要将有效载荷键映射到评论ID
-                view_models = [vm['commentViewModel'] for vm in self.search_dict(response, 'commentViewModel')]
-                surface_keys = {vm['commentSurfaceKey']: vm['commentId']
-                                for vm in view_models if 'commentSurfaceKey' in vm}
-                payments = {surface_keys[key]: payment for key, payment in payments.items() if key in surface_keys}
-
-            toolbar_payloads = self.search_dict(response, 'engagementToolbarStateEntityPayload')
-            toolbar_states = {payload['key']: payload for payload in toolbar_payloads}
-            for comment in reversed(list(self.search_dict(response, 'commentEntityPayload'))):
-                properties = comment['properties']
-                cid = properties['commentId']
-                author = comment['author']
-                toolbar = comment['toolbar']
-                toolbar_state = toolbar_states[properties['toolbarStateKey']]
-                result = {'cid': cid,
-                          'text': properties['content']['content'],
-                          'time': properties['publishedTime'],
-                          'author': author['displayName'],
-                          'channel': author['channelId'],
-                          'votes': toolbar['likeCountNotliked'].strip() or "0",
-                          'replies': toolbar['replyCount'],
-                          'photo': author['avatarThumbnailUrl'],
-                          'heart': toolbar_state.get('heartState', '') == 'TOOLBAR_HEART_STATE_HEARTED',
-                          'reply': '.' in cid}
-
-                try:
-                    result['time_parsed'] = dateparser.parse(result['time'].split('(')[0].strip()).timestamp()
-                except AttributeError:
-                    pass
-
-                if cid in payments:
-                    result['paid'] = payments[cid]
-
-                yield result
-            time.sleep(sleep)
+        continuations = deque([sort_menu[sort_by]['serviceEndpoint']])
+
+        pending = {}
+        stop = threading.Event()
+        try:
+            while continuations:
+                # 预取栈顶的续接请求，网络等待与评论处理重叠进行，处理顺序不变
+                for endpoint in islice(reversed(continuations), PREFETCH):
+                    if id(endpoint) not in pending:
+                        pending[id(endpoint)] = self.executor.submit(self.fetch_page, endpoint, ytcfg, stop)
+                continuation = continuations.pop()
+                response, found, times = pending.pop(id(continuation)).result()
+
+                if not response:
+                    break
+
+                if found['externalErrorMessage']:
+                    raise RuntimeError('服务器返回错误: ' + found['externalErrorMessage'][0])
+
+                actions = found['reloadContinuationItemsCommand'] + found['appendContinuationItemsAction']
+                for action in actions:
+                    target_id = action.get('targetId', '')
+                    is_section = target_id in COMMENT_SECTION_TARGET_IDS
+                    is_replies = target_id.startswith('comment-replies-item')
+                    for item in action.get('continuationItems', ()):
+                        if is_section:
+                            # 处理评论和回复的续接
+                            continuations.extendleft(reversed(list(self.search_dict(item, 'continuationEndpoint'))))
+                        elif is_replies and 'continuationItemRenderer' in item:
+                            # 处理"显示更多回复"按钮
+                            continuations.append(next(self.search_dict(item, 'buttonRenderer'))['command'])
+
+                payments = {}
+                paid_payloads = [payload for payload in found['commentSurfaceEntityPayload'] if 'pdgCommentChip' in payload]
+                if paid_payloads:
+                    # 我们需要将有效载荷键映射到评论ID
+                    # commentViewModel是嵌套的两层，只有内层包含commentSurfaceKey
+                    surface_keys = {vm['commentSurfaceKey']: vm['commentId']
+                                    for vm in found['commentViewModel'] if 'commentSurfaceKey' in vm}
+                    payments = {surface_keys[payload['key']]: next(self.search_dict(payload, 'simpleText'), '')
+                                for payload in paid_payloads if payload['key'] in surface_keys}
+
+                toolbar_states = {payload['key']: payload for payload in found['engagementToolbarStateEntityPayload']}
+                for comment in reversed(found['commentEntityPayload']):
+                    properties = comment['properties']
+                    cid = properties['commentId']
+                    author = comment['author']
+                    toolbar = comment['toolbar']
+                    toolbar_state = toolbar_states[properties['toolbarStateKey']]
+                    result = {'cid': cid,
+                              'text': properties['content']['content'],
+                              'time': properties['publishedTime'],
+                              'author': author['displayName'],
+                              'channel': author['channelId'],
+                              'votes': toolbar['likeCountNotliked'].strip() or "0",
+                              'replies': toolbar['replyCount'],
+                              'photo': author['avatarThumbnailUrl'],
+                              'heart': toolbar_state.get('heartState', '') == 'TOOLBAR_HEART_STATE_HEARTED',
+                              'reply': '.' in cid}
+
+                    time_parsed = times[result['time']]
+                    if time_parsed is not None:
+                        result['time_parsed'] = time_parsed
+
+                    if cid in payments:
+                        result['paid'] = payments[cid]
+
+                    yield result
+                time.sleep(sleep)
+        finally:
+            # 生成器提前关闭时（例如达到--limit），未开始的预取直接取消，
+            # 正在进行的预取在当前请求结束后不再重试，避免退出时长时间等待
+            stop.set()
+            for future in pending.values():
+                future.cancel()
 
     @staticmethod
-    def regex_search(text, pattern, group=1, default=None):
-        """正则表达式搜索辅助函数"""
-        match = re.search(pattern, text)
-        return match.group(group) if match else default
+    def json_search(text, pattern, default=None):
+        """定位JSON对象的起始位置并直接解码，由解码器确定对象的结束位置"""
+        match = pattern.search(text)
+        if not match:
+            return default
+        return JSON_DECODER.raw_decode(text, match.end())[0]
+
+    @staticmethod
+    def search_keys(partial, search_keys):
+        """单次遍历同时查找多个键，返回{键: [值, ...]}；与search_dict不同，匹配到的值也会继续向下搜索"""
+        found = {key: [] for key in search_keys}
+        stack = [partial]
+        push, extend, pop = stack.append, stack.extend, stack.pop
+        while stack:
+            current_item = pop()
+            current_type = type(current_item)
+            if current_type is dict:
+                for key, value in current_item.items():
+                    if key in found:
+                        found[key].append(value)
+                    push(value)
+            elif current_type is list:
+                extend(current_item)
+        return found
 
     @staticmethod
     def search_dict(partial, search_key):
         """递归字典搜索辅助函数"""
         stack = [partial]
+        # 这是最热的循环：用type()比较代替isinstance，并把方法绑定到局部变量
+        push, extend, pop = stack.append, stack.extend, stack.pop
         while stack:
-            current_item = stack.pop()
-            if isinstance(current_item, dict):
+            current_item = pop()
+            current_type = type(current_item)
+            if current_type is dict:
                 for key, value in current_item.items():
                     if key == search_key:
                         yield value
                     else:
-                        stack.append(value)
-            elif isinstance(current_item, list):
-                stack.extend(current_item)
+                        push(value)
+            elif current_type is list:
+                extend(current_item)
+
+
+@functools.lru_cache(maxsize=4096)
+def cached_dateparse_offset(text):
+    """带缓存的dateparser解析，返回距当前时间的秒数或None
+
+    YouTube的发布时间都是相对时间，因此缓存的是偏移量而不是时间戳，
+    否则时间戳会停留在第一次解析的时刻。
+    """
+    parsed = dateparser.parse(text)
+    return time.time() - parsed.timestamp() if parsed else None
+
+
+def parse_time(text):
+    """将评论的发布时间文本（如"2 days ago (edited)"）转换为时间戳，无法解析时返回None"""
+    text = text.split('(')[0].strip()
+    match = RELATIVE_TIME_RE.fullmatch(text)
+    if match:
+        return time.time() - int(match.group(1)) * TIME_UNIT_SECONDS[match.group(2)]
+    offset = cached_dateparse_offset(text)
+    return time.time() - offset if offset is not None else None
 
 
 def to_json(comment, indent=None):
-    """将评论转换为JSON字符串"""
-    comment_str = json.dumps(comment, ensure_ascii=False, indent=indent)
+    """将评论转换为UTF-8编码的JSON字节串"""
     if indent is None:
-        return comment_str
-    padding = ' ' * (2 * indent) if indent else ''
-    return ''.join(padding + line for line in comment_str.splitlines(True))
+        return orjson.dumps(comment)
+    # orjson固定使用两个空格缩进，评论是扁平字典，直接替换行首缩进即可
+    padding = b' ' * (2 * indent)
+    comment_bytes = orjson.dumps(comment, option=orjson.OPT_INDENT_2)
+    comment_bytes = comment_bytes.replace(b'\n  ', b'\n' + padding + b' ' * indent).replace(b'\n}', b'\n' + padding + b'}')
+    return padding + comment_bytes
 
 
 def download_comments(youtube_id=None, youtube_url=None, output_file=None, limit=None, 
@@ -234,46 +347,44 @@ def download_comments(youtube_id=None, youtube_url=None, output_file=None, limit
     )
 
     count = 1
-    with io.open(output_file, 'w', encoding='utf8') as fp:
+    with open(output_file, 'wb', buffering=OUTPUT_BUFFER_SIZE) as fp:
         sys.stdout.write('已下载 %d 条评论\r' % count)
         sys.stdout.flush()
         start_time = time.time()
 
-        fp.write('{\n')
+        fp.write(b'{\n')
         if pretty:
-            fp.write(' ' * INDENT + '"comments": [\n')
+            fp.write(b' ' * INDENT + b'"comments": [\n')
         else:
-            fp.write('"comments":[\n')
+            fp.write(b'"comments":[\n')
         
-        first_comment = True
+        padding = b' ' * (2 * INDENT)
+        separator = b''
 
         comment = next(generator, None)
         while comment:
-            if not first_comment:
-                fp.write(',\n')
-            else:
-                first_comment = False
-            
             if pretty:
-                comment_str = to_json(comment, indent=INDENT)
-                padding = ' ' * (2 * INDENT)
-                comment_str = padding + comment_str
+                comment_bytes = padding + to_json(comment, indent=INDENT)
             else:
-                comment_str = to_json(comment, indent=None)
-            
-            fp.write(comment_str)
-            
+                comment_bytes = to_json(comment, indent=None)
+            fp.write(separator + comment_bytes)
+            separator = b',\n'
+
             comment = None if limit and count >= limit else next(generator, None)
-            sys.stdout.write('已下载 %d 条评论\r' % count)
-            sys.stdout.flush()
+            if count % PROGRESS_INTERVAL == 0:
+                sys.stdout.write('已下载 %d 条评论\r' % count)
+                sys.stdout.flush()
             count += 1
 
-        fp.write('\n')
+        # 立即关闭生成器，通知仍在进行的预取停止重试
+        generator.close()
+        sys.stdout.write('已下载 %d 条评论\r' % (count - 1))
+        fp.write(b'\n')
         if pretty:
-            fp.write(' ' * INDENT + ']\n')
+            fp.write(b' ' * INDENT + b']\n')
         else:
-            fp.write(']\n')
-        fp.write('}')
+            fp.write(b']\n')
+        fp.write(b'}')
         fp.flush()
     print('\n[{:.2f} 秒] 完成!'.format(time.time() - start_time))
     return count - 1